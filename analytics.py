@@ -0,0 +1,225 @@
+# analytics.py
+import threading
+from array import array
+from datetime import datetime, date
+
+from dateutil import parser
+
+# Per-doctor columns indexed by day offset from "base" (a date ordinal):
+#   booked[i], cancelled[i]  -> counts for that appointment date
+#   hours[i * 24 + h]        -> live bookings whose slot starts in hour h of that date
+# Book/cancel events bump the counters in place, so every report is a handful
+# of slice sums and never reads the Sheets backend.
+_columns = {}
+_lock = threading.Lock()
+
+
+def _doctor_key(doctor):
+    return doctor.strip().lower()
+
+
+def _to_ordinal(date_str):
+    return datetime.strptime(date_str, "%d-%m-%Y").date().toordinal()
+
+
+def _to_date_str(ordinal):
+    return date.fromordinal(ordinal).strftime("%d-%m-%Y")
+
+
+def _zeros(n):
+    return array("I", [0]) * n
+
+
+def _grow(col, ordinal):
+    """Make sure col covers ordinal; returns its index (caller holds _lock)."""
+    if not col["booked"]:
+        col["base"] = ordinal
+    if ordinal < col["base"]:
+        pad = col["base"] - ordinal
+        col["booked"] = _zeros(pad) + col["booked"]
+        col["cancelled"] = _zeros(pad) + col["cancelled"]
+        col["hours"] = _zeros(24 * pad) + col["hours"]
+        col["base"] = ordinal
+    idx = ordinal - col["base"]
+    if idx >= len(col["booked"]):
+        pad = idx + 1 - len(col["booked"])
+        col["booked"].extend(_zeros(pad))
+        col["cancelled"].extend(_zeros(pad))
+        col["hours"].extend(_zeros(24 * pad))
+    return idx
+
+
+def _record(doctor, date_str, time_str, cancelled):
+    ordinal = _to_ordinal(date_str)
+    try:
+        hour = datetime.strptime(time_str.strip(), "%I:%M %p").hour
+    except ValueError:
+        hour = parser.parse(time_str).hour
+    with _lock:
+        col = _columns.get(_doctor_key(doctor))
+        if col is None:
+            col = _columns[_doctor_key(doctor)] = {
+                "name": doctor.strip(), "base": ordinal,
+                "booked": array("I"), "cancelled": array("I"), "hours": array("I"),
+            }
+        idx = _grow(col, ordinal)
+        if cancelled:
+            col["cancelled"][idx] += 1
+            if col["hours"][idx * 24 + hour]:
+                col["hours"][idx * 24 + hour] -= 1
+        else:
+            col["booked"][idx] += 1
+            col["hours"][idx * 24 + hour] += 1
+
+
+def record_booking(doctor, date_str, time_str):
+    """date_str is dd-mm-yyyy, time_str like '03:20 PM'."""
+    try:
+        _record(doctor, date_str, time_str, cancelled=False)
+    except Exception as e:
+        print(f"[WARN] Analytics booking event dropped → {e}")
+
+
+def record_cancellation(doctor, date_str, time_str):
+    try:
+        _record(doctor, date_str, time_str, cancelled=True)
+    except Exception as e:
+        print(f"[WARN] Analytics cancellation event dropped → {e}")
+
+
+def seed_from_bookings(bookings):
+    """Build the store from existing booking rows (only used when it starts empty)."""
+    for b in bookings:
+        if not (b.get('Doctor') and b.get('Date') and b.get('Time')):
+            continue
+        try:
+            date_str = parser.parse(str(b['Date']), dayfirst=True).strftime("%d-%m-%Y")
+        except Exception:
+            continue
+        record_booking(b['Doctor'], date_str, str(b['Time']))
+
+
+def is_empty():
+    return not _columns
+
+
+def get_state():
+    with _lock:
+        return {k: {**c, "booked": array("I", c["booked"]), "cancelled": array("I", c["cancelled"]),
+                    "hours": array("I", c["hours"])} for k, c in _columns.items()}
+
+
+def restore_state(state):
+    with _lock:
+        _columns.clear()
+        _columns.update(state)
+
+
+# ---------------- Reports ----------------
+
+def _range(col, start, end):
+    """Index range [a, b) of col covering ordinals start..end (inclusive); None means open."""
+    a = 0 if start is None else max(0, start - col["base"])
+    b = len(col["booked"]) if end is None else min(len(col["booked"]), end - col["base"] + 1)
+    return a, max(a, b)
+
+
+def _selected(doctor):
+    if doctor:
+        col = _columns.get(_doctor_key(doctor))
+        return [col] if col else []
+    return list(_columns.values())
+
+
+def bookings_per_day(doctor=None, start=None, end=None):
+    """
+    start/end are date ordinals (inclusive).
+    Returns {doctor: {date: {"booked", "cancelled", "net"}}}; "net" matches what
+    peak_hours and utilization count.
+    """
+    out = {}
+    labels = {}
+    with _lock:
+        for col in _selected(doctor):
+            a, b = _range(col, start, end)
+            booked, cancelled, base = col["booked"], col["cancelled"], col["base"]
+            days = {}
+            for i in range(a, b):
+                if booked[i] or cancelled[i]:
+                    o = base + i
+                    label = labels.get(o) or labels.setdefault(o, _to_date_str(o))
+                    days[label] = {"booked": booked[i], "cancelled": cancelled[i], "net": booked[i] - cancelled[i]}
+            if days:
+                out[col["name"]] = days
+    return out
+
+
+def cancellation_rates(doctor=None, start=None, end=None):
+    out = {}
+    with _lock:
+        for col in _selected(doctor):
+            a, b = _range(col, start, end)
+            booked = sum(col["booked"][a:b])
+            cancelled = sum(col["cancelled"][a:b])
+            if booked or cancelled:
+                out[col["name"]] = {
+                    "booked": booked,
+                    "cancelled": cancelled,
+                    "cancellation_rate": round(cancelled / booked, 4) if booked else 0.0,
+                }
+    return out
+
+
+def peak_hours(doctor=None, start=None, end=None):
+    """Returns [{"hour": "10:00 AM", "bookings": n}, ...] busiest first."""
+    totals = [0] * 24
+    with _lock:
+        for col in _selected(doctor):
+            a, b = _range(col, start, end)
+            window = col["hours"][a * 24:b * 24]
+            for h in range(24):
+                totals[h] += sum(window[h::24])
+    ranked = sorted((h for h in range(24) if totals[h]), key=lambda h: -totals[h])
+    return [{"hour": datetime(2000, 1, 1, h).strftime("%I:%M %p"), "bookings": totals[h]} for h in ranked]
+
+
+def utilization(doctors, capacity, start, end):
+    """
+    doctors: doctor records; capacity: callable returning the slots a record offers in start..end.
+    Utilization = (bookings - cancellations) / slots offered.
+    """
+    out = {}
+    for d in doctors:
+        name = d.get('Doctor')
+        if not name:
+            continue
+        offered = capacity(d)
+        with _lock:
+            col = _columns.get(_doctor_key(name))
+            if col:
+                a, b = _range(col, start, end)
+                used = sum(col["booked"][a:b]) - sum(col["cancelled"][a:b])
+            else:
+                used = 0
+        out[name] = {
+            "booked": used,
+            "available_slots": offered,
+            "utilization": round(used / offered, 4) if offered else 0.0,
+        }
+    return out
+
+
+def parse_range(start_str=None, end_str=None, default_days=None):
+    """
+    Turn optional dd-mm-yyyy strings into inclusive (start, end) ordinals.
+    Missing bounds stay open (None) unless default_days is given, in which case
+    end defaults to today and start to default_days before end.
+    """
+    start = _to_ordinal(start_str) if start_str else None
+    end = _to_ordinal(end_str) if end_str else None
+    if default_days:
+        if end is None:
+            end = datetime.now().date().toordinal()
+        if start is None:
+            start = end - default_days + 1
+    return start, end
@@ -1,11 +1,21 @@
 # app.py
 import os
-from fastapi import FastAPI
+import json
+from fastapi import FastAPI, Request, HTTPException, Header
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 
 from chatbot_logic import process_message
+from google_sheets import refresh_all_in_background, get_all_bookings, get_all_doctors
+from appointment_logic import _parse_date_flexible
+from doctor_schedule import get_schedule, count_slots
+import analytics
+from conversation_log import record_turn, get_history, issue_token, check_token
+from snapshot import load_snapshot, save_snapshot, start_snapshot_thread
+from whatsapp_webhook import verify_signature, verify_subscription, enqueue_payload, start_workers
+from waitlist import start_expiry_thread
 
 load_dotenv()
 
@@ -19,15 +29,103 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.on_event("startup")
+def warm_start():
+    # serve from the last snapshot right away, then resync the sheets behind it
+    load_snapshot()
+    refresh_all_in_background()
+    if analytics.is_empty():
+        # seed before serving traffic so live booking events can't be counted twice
+        try:
+            analytics.seed_from_bookings(get_all_bookings())
+        except Exception as e:
+            print(f"[WARN] Analytics seeding failed → {e}")
+    start_snapshot_thread()
+    start_expiry_thread()
+    start_workers()
+
+@app.on_event("shutdown")
+def final_snapshot():
+    save_snapshot()
+
 class Message(BaseModel):
     user_id: str = None
     text: str
+    hidden: bool = False  # sent by the widget, not typed by the user
 
 @app.post("/message")
 def message_endpoint(msg: Message):
+    # "wa:" ids belong to WhatsApp users (see whatsapp_webhook.py)
+    if msg.user_id and msg.user_id.startswith("wa:"):
+        raise HTTPException(status_code=400, detail="Invalid user_id")
     response = process_message(msg.user_id, msg.text)
+    if msg.user_id:
+        response["cursor"] = record_turn(msg.user_id, msg.text, response, hidden=msg.hidden)
+        response["history_token"] = issue_token(msg.user_id)
     return response
 
+@app.get("/history")
+def history_endpoint(user_id: str, after: int = 0, limit: int = 100,
+                     x_history_token: str = Header(None)):
+    # turns after the given cursor, so the widget only fetches what it hasn't seen;
+    # only the browser holding the user's token can read them
+    if user_id.startswith("wa:") or not check_token(user_id, x_history_token):
+        raise HTTPException(status_code=403, detail="Not allowed")
+    return get_history(user_id, after, min(max(limit, 1), 500))
+
+@app.get("/webhook")
+def webhook_verify(request: Request):
+    params = request.query_params
+    challenge = verify_subscription(params.get("hub.mode"), params.get("hub.verify_token"), params.get("hub.challenge"))
+    if challenge is None:
+        raise HTTPException(status_code=403, detail="Verification failed")
+    return PlainTextResponse(challenge)
+
+@app.post("/webhook")
+async def webhook_receive(request: Request):
+    # acknowledge straight away; replies are sent from the worker queues
+    body = await request.body()
+    if not verify_signature(body, request.headers.get("X-Hub-Signature-256")):
+        raise HTTPException(status_code=403, detail="Invalid signature")
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid JSON")
+    queued = enqueue_payload(payload)
+    return {"status": "received", "queued": queued}
+
+# ---------------- REPORTS (served from the analytics store, not the sheet) ----------------
+def _report_range(start, end, default_days=None):
+    try:
+        return analytics.parse_range(
+            _parse_date_flexible(start) if start else None,
+            _parse_date_flexible(end) if end else None,
+            default_days,
+        )
+    except Exception:
+        raise HTTPException(status_code=400, detail="Dates must be in dd-mm-yyyy format")
+
+@app.get("/reports/bookings")
+def report_bookings(doctor: str = None, start: str = None, end: str = None):
+    return analytics.bookings_per_day(doctor, *_report_range(start, end))
+
+@app.get("/reports/cancellations")
+def report_cancellations(doctor: str = None, start: str = None, end: str = None):
+    return analytics.cancellation_rates(doctor, *_report_range(start, end))
+
+@app.get("/reports/peak-hours")
+def report_peak_hours(doctor: str = None, start: str = None, end: str = None):
+    return analytics.peak_hours(doctor, *_report_range(start, end))
+
+@app.get("/reports/utilization")
+def report_utilization(doctor: str = None, start: str = None, end: str = None):
+    # defaults to the last 30 days
+    start_ord, end_ord = _report_range(start, end, default_days=30)
+    doctors = get_all_doctors()
+    if doctor:
+        doctors = [d for d in doctors if d.get('Doctor') and d['Doctor'].strip().lower() == doctor.strip().lower()]
+    return analytics.utilization(doctors, lambda d: count_slots(get_schedule(d), start_ord, end_ord), start_ord, end_ord)
+
 @app.get("/")
 def root():
     return {"status": "ok", "info": "Hospital Chatbot Backend"}
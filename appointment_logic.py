@@ -1,21 +1,15 @@
 # appointment_logic.py
-from datetime import datetime, timedelta, time as dt_time
+from datetime import datetime, date, timedelta, time as dt_time
 from dateutil import parser
 import re
 
 from google_sheets import (
     get_all_doctors, get_all_leaves, get_all_bookings, get_all_holidays, append_booking
 )
-
-WEEKDAY_MAP = {
-    'mon': 0, 'monday': 0,
-    'tue': 1, 'tues': 1, 'tuesday': 1,
-    'wed': 2, 'wednesday': 2,
-    'thu': 3, 'thurs': 3, 'thursday': 3,
-    'fri': 4, 'friday': 4,
-    'sat': 5, 'saturday': 5,
-    'sun': 6, 'sunday': 6,
-}
+from waitlist import get_held_slots, claim_hold, offer_freed_slot
+from analytics import record_booking, record_cancellation
+import doctor_schedule
+from doctor_schedule import WEEKDAY_MAP, _doctor_workdays_to_indices
 
 def _normalize_time_string(s):
     """
@@ -89,20 +83,6 @@ def get_doctor_by_name(name):
             return d
     return None
 
-def _doctor_workdays_to_indices(workdays_str):
-    # e.g. "Mon, Wed, Fri"
-    parts = [p.strip().lower() for p in workdays_str.split(',')]
-    idxs = []
-    for p in parts:
-        if p in WEEKDAY_MAP:
-            idxs.append(WEEKDAY_MAP[p])
-        else:
-            # try first 3 letters
-            p3 = p[:3]
-            if p3 in WEEKDAY_MAP:
-                idxs.append(WEEKDAY_MAP[p3])
-    return sorted(set(idxs))
-
 def is_holiday(date_str):
     """date_str must be dd-mm-yyyy"""
     holidays = get_all_holidays()
@@ -131,84 +111,49 @@ def is_doctor_on_leave(doctor_name, date_str):
                 continue
     return False, ""
 
-def generate_next_n_days_for_doctor(doctor_record, n=7):
+def generate_next_n_days_for_doctor(doctor_record, n=7, horizon=365):
     # returns list of dicts {date_str, available(boolean), reason_if_not}
-    workdays = _doctor_workdays_to_indices(doctor_record.get('Days', ''))
+    # for the next n working days found within horizon days from today
+    sched = doctor_schedule.get_schedule(doctor_record)
     results = []
-    today = datetime.now().date()
-    days_checked = 0
-    day = today
-    while len(results) < n:
-        weekday_idx = day.weekday()
-        readable = day.strftime("%d-%m-%Y")
-        if weekday_idx in workdays:
-            # check holiday and leave
-            hol, hol_name = is_holiday(readable)
-            if hol:
-                results.append({'date': readable, 'status': 'Holiday', 'note': hol_name})
-                day = day + timedelta(days=1); continue
-            leave, leave_reason = is_doctor_on_leave(doctor_record['Doctor'], readable)
-            if leave:
-                results.append({'date': readable, 'status': 'Leave', 'note': leave_reason})
-                day = day + timedelta(days=1); continue
-            # else available
-            results.append({'date': readable, 'status': 'Available', 'note': ''})
-        day = day + timedelta(days=1)
-        days_checked += 1
-        if days_checked > 30:  # fallback safety
+    today = datetime.now().date().toordinal()
+    for o, status, note, _ in doctor_schedule.iter_days(sched, today, horizon):
+        results.append({'date': date.fromordinal(o).strftime("%d-%m-%Y"), 'status': status, 'note': note})
+        if len(results) >= n:
             break
     return results
 
-def get_available_time_slots(doctor_record, date_str, slot_minutes=20):
+def get_all_time_slots(doctor_record, date_str, slot_minutes=None):
     """
-    Returns available times like ["03:00 PM", "03:20 PM", ...] excluding booked times for given doctor/date.
+    Returns every slot the doctor offers on date_str (dd-mm-yyyy), like ["03:00 PM", "03:20 PM", ...],
+    following that day's shifts, breaks and overrides (empty on holidays/leave).
     """
+    sched = doctor_schedule.get_schedule(doctor_record)
+    return list(doctor_schedule.slots_on(sched, datetime.strptime(date_str, "%d-%m-%Y").toordinal(), slot_minutes))
 
-    # --- Fix: normalize time strings properly ---
-    def normalize_time(time_str):
-        t = str(time_str).strip().upper().replace('.', '').replace(' ', '')
-        # Ensure AM/PM present
-        if 'AM' not in t and 'PM' not in t:
-            # Guess based on hour
-            hour = int(t.split(':')[0]) if ':' in t else int(re.sub(r'\D', '', t) or 9)
-            t += 'PM' if hour >= 12 else 'AM'
-        # Handle 12 PM / 12 AM edge cases properly
-        if t.startswith("12:") and "AM" in t:
-            return parser.parse("00:" + t.split(':', 1)[1])
-        elif t.startswith("12:") and "PM" in t:
-            return parser.parse("12:" + t.split(':', 1)[1])
-        return parser.parse(t)
-
-    # --- Parse doctor start and end times ---
-    try:
-        st = normalize_time(doctor_record['Start Time'])
-        ed = normalize_time(doctor_record['End Time'])
-    except Exception as e:
-        print(f"[WARN] Time parse failed for {doctor_record.get('Doctor')} → {e}")
-        st = parser.parse("09:00 AM")
-        ed = parser.parse("05:00 PM")
-
-    print(f"[DEBUG] {doctor_record['Doctor']} slots from {st.strftime('%I:%M %p')} to {ed.strftime('%I:%M %p')}")
+def get_day_status(doctor_record, date_str):
+    """
+    (status, note) for the doctor on date_str: 'Available', 'Holiday', 'Leave' or 'Closed'.
+    Returns None if the doctor doesn't work that weekday.
+    """
+    sched = doctor_schedule.get_schedule(doctor_record)
+    info = doctor_schedule.day_info(sched, datetime.strptime(date_str, "%d-%m-%Y").toordinal())
+    if not info:
+        return None
+    return info[1], info[2]
 
-    # --- Generate slot list ---
-    slots = []
-    cur = st
-    while cur < ed:
-        slots.append(cur.strftime("%I:%M %p"))
-        cur = cur + timedelta(minutes=slot_minutes)
+def get_available_time_slots(doctor_record, date_str, slot_minutes=None, phone=None):
+    """
+    Returns available times like ["03:00 PM", "03:20 PM", ...] excluding booked times for given doctor/date.
+    Slots held for a waitlisted patient are hidden from everyone except that patient's phone.
+    """
+    slots = get_all_time_slots(doctor_record, date_str, slot_minutes)
 
     # --- Remove booked slots ---
-    bookings = get_all_bookings()
-    booked = [
-        b['Time']
-        for b in bookings
-        if b.get('Doctor')
-        and b.get('Date')
-        and b['Doctor'].strip().lower() == doctor_record['Doctor'].strip().lower()
-        and _parse_date_flexible(b['Date']) == date_str
-    ]
-
-    available = [s for s in slots if s not in booked]
+    booked = doctor_schedule.get_booked(doctor_record['Doctor'], datetime.strptime(date_str, "%d-%m-%Y").toordinal())
+    held = get_held_slots(doctor_record['Doctor'], date_str, phone)
+
+    available = [s for s in slots if s not in booked and s not in held]
     return available
 
 
@@ -237,7 +182,7 @@ def book_appointment(doctor_name, date_raw, time_raw, phone):
         return False, f"Doctor is on leave ({leavereason})."
 
     # check if slot available
-    available = get_available_time_slots(dr, date_str)
+    available = get_available_time_slots(dr, date_str, phone=phone)
     if time_norm not in available:
         # suggest next available time if any
         if available:
@@ -247,6 +192,8 @@ def book_appointment(doctor_name, date_raw, time_raw, phone):
 
     # All good -> append
     append_booking(dr['Doctor'], date_str, time_norm, phone)
+    claim_hold(dr['Doctor'], date_str, time_norm, phone)
+    record_booking(dr['Doctor'], date_str, time_norm)
     return True, f"Appointment with {dr['Doctor']} on {date_str} at {time_norm} booked."
 
 def find_appointments_by_phone(phone):
@@ -317,6 +264,11 @@ def cancel_appointment(phone, doctor, date, time):
         return False, "No matching appointment found."
 
     overwrite_bookings(new_data)
+    record_cancellation(doctor, target_date, target_time)
+
+    # hand the freed slot to the next waitlisted patient, if any
+    offer_freed_slot(doctor, target_date, target_time)
+
     return True, f" Appointment with {doctor} on {target_date} at {target_time} has been cancelled."
     
     # 🚀 Send WhatsApp cancellation message
@@ -0,0 +1,86 @@
+# bench_schedule.py
+"""
+Benchmark: 90-day availability for every doctor from compiled schedules.
+
+    python bench_schedule.py [doctors] [days]
+
+Uses synthetic sheet rows (no Google Sheets access): split shifts, breaks,
+per-specialization slot lengths, holidays, leave and existing bookings.
+"""
+import sys
+import time
+import random
+from datetime import date, timedelta
+
+from doctor_schedule import compile_schedules, iter_days, booked_by_day
+
+SPECS = ["Cardiology", "Dermatology", "ENT", "General Medicine", "Neurology", "Orthopedics", "Pediatrics"]
+DAY_SETS = ["Mon, Wed, Fri", "Tue, Thu, Sat", "Mon, Tue, Wed, Thu, Fri", "Mon, Thu"]
+
+
+def make_data(n_doctors, days, seed=42):
+    rnd = random.Random(seed)
+    today = date.today()
+    doctors, leaves, bookings = [], [], []
+    templates = {"slot_minutes": {"Cardiology": 30, "Neurology": 30, "ENT": 15, "default": 20}, "doctors": {}}
+
+    for i in range(n_doctors):
+        name = f"Dr. Bench {i:03d}"
+        start = rnd.choice([8, 9, 10])
+        doctors.append({
+            "Doctor": name,
+            "Specialization": rnd.choice(SPECS),
+            "Days": rnd.choice(DAY_SETS),
+            "Start Time": f"{start:02d}:00 AM",
+            "End Time": f"{rnd.choice([4, 5, 6]):02d}:00 PM",
+            "Breaks": "01:00 PM-02:00 PM" if i % 2 else "",
+        })
+        if i % 3 == 0:
+            # split shift with a different Saturday and a couple of date overrides
+            templates["doctors"][name] = {
+                "weekly": {"Mon": ["09:00 AM-12:00 PM", "04:00 PM-08:00 PM"],
+                           "Wed": ["09:00 AM-12:00 PM", "04:00 PM-08:00 PM"],
+                           "Sat": ["10:00 AM-01:00 PM"]},
+                "breaks": ["10:30 AM-10:45 AM"],
+                "overrides": {
+                    (today + timedelta(days=10)).strftime("%d-%m-%Y"): [],
+                    (today + timedelta(days=12)).strftime("%d-%m-%Y"): ["09:00 AM-11:00 AM"],
+                },
+            }
+        for _ in range(5):
+            leaves.append({"Doctor": name, "Date": (today + timedelta(days=rnd.randrange(days))).strftime("%d-%m-%Y"), "Reason": "Conference"})
+        for _ in range(200):
+            d = today + timedelta(days=rnd.randrange(days))
+            bookings.append({"Doctor": name, "Date": d.strftime("%d-%m-%Y"),
+                             "Time": f"{rnd.randint(9, 11):02d}:{rnd.choice(['00', '20', '40'])} AM", "Phone": "9000000000"})
+
+    holidays = [{"Date": (today + timedelta(days=k)).strftime("%d-%m-%Y"), "Occasion": "Holiday"} for k in range(7, days, 30)]
+    return doctors, leaves, holidays, bookings, templates
+
+
+def run(n_doctors=100, days=90):
+    doctors, leaves, holidays, bookings, templates = make_data(n_doctors, days)
+    today = date.today().toordinal()
+
+    t0 = time.perf_counter()
+    compiled = compile_schedules(doctors, leaves, holidays, templates)
+    booked = booked_by_day(bookings)
+    t1 = time.perf_counter()
+
+    open_slots = 0
+    for key, sched in compiled.items():
+        taken = booked.get(key, {})
+        for o, status, note, slots in iter_days(sched, today, days):
+            b = taken.get(o)
+            open_slots += len(slots) - (len(b.intersection(slots)) if b else 0)
+    t2 = time.perf_counter()
+
+    print(f"{n_doctors} doctors, {days} days, {len(bookings)} bookings")
+    print(f"compile schedules + booking index: {(t1 - t0) * 1000:8.1f} ms")
+    print(f"availability over horizon:         {(t2 - t1) * 1000:8.1f} ms  ({open_slots} open slots)")
+    print(f"total:                             {(t2 - t0) * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:3]]
+    run(*args)
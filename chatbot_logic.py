@@ -1,16 +1,22 @@
+import os
 import re
+import time
 import uuid
 from typing import Dict
 from appointment_logic import (
     get_specializations, get_doctors_by_specialization, get_doctor_by_name,
-    generate_next_n_days_for_doctor, get_available_time_slots, book_appointment
+    generate_next_n_days_for_doctor, get_available_time_slots, book_appointment, get_day_status
 )
 from whatsapp_api import send_confirmation_template
 from appointment_logic import find_appointments_by_phone, cancel_appointment  # 👈 add these imports
+from waitlist import join_waitlist
 
 # in-memory sessions
 sessions: Dict[str, dict] = {}
 
+# sessions untouched for this long are dropped (see prune_idle_sessions)
+SESSION_IDLE_HOURS = float(os.getenv("SESSION_IDLE_HOURS", "24"))
+
 def _new_session(user_id):
     sid = user_id or str(uuid.uuid4())
     sessions[sid] = {
@@ -25,10 +31,21 @@ def _new_session(user_id):
 
 def _get_session(user_id):
     if user_id and user_id in sessions:
-        return user_id, sessions[user_id]
-    # create new
-    sid = _new_session(user_id)
-    return sid, sessions[sid]
+        sess = sessions[user_id]
+    else:
+        # create new
+        user_id = _new_session(user_id)
+        sess = sessions[user_id]
+    sess["last_active"] = time.time()
+    return user_id, sess
+
+def prune_idle_sessions(now=None):
+    """Drop sessions idle for more than SESSION_IDLE_HOURS; returns how many were dropped."""
+    cutoff = (now or time.time()) - SESSION_IDLE_HOURS * 3600
+    idle = [sid for sid, sess in list(sessions.items()) if sess.get("last_active", 0) < cutoff]
+    for sid in idle:
+        sessions.pop(sid, None)
+    return len(idle)
 
 def process_message(user_id, text):
     sid, sess = _get_session(user_id)
@@ -216,23 +233,55 @@ def process_message(user_id, text):
         sess["state"] = "awaiting_date"
         return {"reply": text}
 
+    if state == "awaiting_waitlist":
+        if text_clean.lower() in ["join waitlist", "waitlist"]:
+            pos = join_waitlist(sess["doctor"], sess["date"], sess["phone"])
+            sess["state"] = "done"
+            return {
+                "reply": f"📝 You're #{pos} on the waitlist for {sess['doctor']} on {sess['date']}.\nIf a slot opens up we'll hold it for you and send the details on WhatsApp.\n\nAnything else you’d like me to help with?",
+                "buttons": ["No", "Yes"]
+            }
+        if text_clean.lower() in ["pick another date", "another date"]:
+            sess["state"] = "awaiting_date"
+            return {"reply": "Please type another date (dd-mm-yyyy)."}
+        # anything else is treated as a new date
+        state = "awaiting_date"
+
     if state == "awaiting_date":
         try:
             from appointment_logic import _parse_date_flexible
             date_norm = _parse_date_flexible(text_clean)
+        except Exception:
+            return {"reply": "Couldn't read that date. Please type the date in dd-mm or dd-mm-yyyy format."}
+        try:
             sess["date"] = date_norm
+            sess["state"] = "awaiting_date"
             doc = get_doctor_by_name(sess["doctor"])
             if not doc:
                 return {"reply": "Doctor not set. Please start again."}
-            slots = get_available_time_slots(doc, date_norm)
+
+            # closed days can't be waitlisted: nothing will ever free up
+            day = get_day_status(doc, date_norm)
+            if day is None:
+                return {"reply": f"{doc['Doctor']} doesn't work on {date_norm} (Working Days: {doc.get('Days','')}). Please pick another date."}
+            status, note = day
+            if status != "Available":
+                detail = f" ({note})" if note else ""
+                return {"reply": f"{date_norm} is not available for {doc['Doctor']}: {status}{detail}. Please pick another date."}
+
+            slots = get_available_time_slots(doc, date_norm, phone=sess.get("phone"))
             if not slots:
-                sess["state"] = "awaiting_time"
-                return {"reply": "No slots available on this date. Please pick another date."}
+                sess["state"] = "awaiting_waitlist"
+                return {
+                    "reply": "No slots available on this date. Please pick another date, or join the waitlist and we'll message you on WhatsApp if a slot opens up.",
+                    "buttons": ["Join Waitlist", "Pick Another Date"]
+                }
             sess["state"] = "awaiting_time"
             buttons = slots[:6]
             return {"reply": f"Available time slots for {sess['doctor']} on {date_norm}:", "buttons": buttons}
-        except Exception:
-            return {"reply": "Couldn't read that date. Please type the date in dd-mm or dd-mm-yyyy format."}
+        except Exception as e:
+            print(f"[WARN] Slot lookup failed for {sess.get('doctor')} on {date_norm} → {e}")
+            return {"reply": "Sorry, I couldn't look up slots for that date right now. Please try again shortly."}
 
     if state == "awaiting_time":
         try:
@@ -0,0 +1,158 @@
+# conversation_log.py
+"""
+Append-only transcript of chatbot turns, kept in rotating JSON-lines segment files:
+
+    chat_logs/segment-000001.jsonl, segment-000002.jsonl, ...
+
+Each line is one turn: {"seq", "ts", "user_id", "text", "reply", "buttons"}, plus
+"hidden": true when the user's text was sent by the widget itself (e.g. the opening "start").
+"seq" is a global, increasing cursor; clients ask for turns after the last seq they saw.
+Reading a transcript needs the per-user token handed out with each web reply
+(HMAC of the user_id with CHAT_HISTORY_SECRET).
+The log is owned by a single process; run one writer per CHAT_LOG_DIR.
+"""
+import os
+import re
+import hmac
+import json
+import time
+import bisect
+import hashlib
+import threading
+
+LOG_DIR = os.getenv("CHAT_LOG_DIR", "chat_logs")
+SEGMENT_MAX_BYTES = int(os.getenv("CHAT_LOG_SEGMENT_BYTES", str(4 * 1024 * 1024)))
+
+_SECRET = os.getenv("CHAT_HISTORY_SECRET", "").encode()
+if not _SECRET:
+    print("[WARN] CHAT_HISTORY_SECRET not set: history tokens will stop working after a restart")
+    _SECRET = os.urandom(32)
+
+_SEGMENT_RE = re.compile(r"^segment-(\d{6})\.jsonl$")
+
+_lock = threading.Lock()
+_loaded = False
+_next_seq = 1
+_segment_no = 0
+_segment_file = None
+_segment_size = 0
+
+# user_id -> ([seq, ...], [(segment_no, offset, length), ...]) in seq order
+_index = {}
+
+
+def issue_token(user_id):
+    """Token a client must present to read user_id's history."""
+    return hmac.new(_SECRET, user_id.encode(), hashlib.sha256).hexdigest()
+
+
+def check_token(user_id, token):
+    return bool(token) and hmac.compare_digest(issue_token(user_id), token)
+
+
+def _segment_path(no):
+    return os.path.join(LOG_DIR, f"segment-{no:06d}.jsonl")
+
+
+def _index_turn(user_id, seq, location):
+    seqs, locations = _index.setdefault(user_id, ([], []))
+    seqs.append(seq)
+    locations.append(location)
+
+
+def _load():
+    """Rebuild the per-user index and the next seq from the segments on disk (caller holds _lock)."""
+    global _loaded, _next_seq, _segment_no, _segment_size
+    os.makedirs(LOG_DIR, exist_ok=True)
+    segments = sorted(int(m.group(1)) for m in map(_SEGMENT_RE.match, os.listdir(LOG_DIR)) if m)
+    good_end = 0
+    for no in segments:
+        with open(_segment_path(no), "rb") as f:
+            offset = good_end = 0
+            for line in f:
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError("unterminated line")
+                    turn = json.loads(line)
+                    _index_turn(turn["user_id"], turn["seq"], (no, offset, len(line)))
+                    _next_seq = max(_next_seq, turn["seq"] + 1)
+                    good_end = offset + len(line)
+                except (ValueError, KeyError):
+                    pass  # torn line after a crash
+                offset += len(line)
+    _segment_no = segments[-1] if segments else 1
+    _segment_size = good_end
+    if segments and good_end < offset:
+        # cut a torn tail off so the next turn starts on its own line
+        print(f"[WARN] Dropping {offset - good_end} torn bytes at the end of {_segment_path(_segment_no)}")
+        os.truncate(_segment_path(_segment_no), good_end)
+    _loaded = True
+
+
+def _open_segment():
+    global _segment_file, _segment_no, _segment_size
+    if _segment_file and _segment_size >= SEGMENT_MAX_BYTES:
+        _segment_file.close()
+        _segment_file = None
+        _segment_no += 1
+        _segment_size = 0
+    if _segment_file is None:
+        _segment_file = open(_segment_path(_segment_no), "ab")
+    return _segment_file
+
+
+def record_turn(user_id, text, response, hidden=False):
+    """
+    Append one user message and the bot's response; returns the turn's seq (cursor).
+    hidden marks text the user never typed, so clients show only the reply.
+    """
+    global _next_seq, _segment_size
+    with _lock:
+        if not _loaded:
+            _load()
+        seq = _next_seq
+        turn = {
+            "seq": seq,
+            "ts": time.time(),
+            "user_id": user_id,
+            "text": text,
+            "reply": response.get("reply", ""),
+            "buttons": response.get("buttons") or [],
+        }
+        if hidden:
+            turn["hidden"] = True
+        line = (json.dumps(turn, ensure_ascii=False) + "\n").encode("utf-8")
+        f = _open_segment()
+        f.write(line)
+        f.flush()
+        _index_turn(user_id, seq, (_segment_no, _segment_size, len(line)))
+        _segment_size += len(line)
+        _next_seq += 1
+        return seq
+
+
+def get_history(user_id, after=0, limit=100):
+    """
+    Turns for user_id with seq > after, oldest first, at most limit of them.
+    Returns {"turns": [...], "cursor": seq of the last turn returned (or after), "more": bool}.
+    """
+    with _lock:
+        if not _loaded:
+            _load()
+        seqs, locations = _index.get(user_id, ([], []))
+        start = bisect.bisect_right(seqs, after)
+        wanted = locations[start:start + limit]
+        more = start + limit < len(seqs)
+
+    turns = []
+    files = {}
+    try:
+        for no, offset, length in wanted:
+            f = files.get(no) or files.setdefault(no, open(_segment_path(no), "rb"))
+            f.seek(offset)
+            turns.append(json.loads(f.read(length)))
+    finally:
+        for f in files.values():
+            f.close()
+
+    return {"turns": turns, "cursor": turns[-1]["seq"] if turns else after, "more": more}
@@ -0,0 +1,388 @@
+# doctor_schedule.py
+import os
+import re
+import json
+import threading
+from functools import lru_cache
+from datetime import datetime, date
+
+from dateutil import parser
+
+# Optional JSON file with per-doctor weekly templates, breaks, slot lengths and date overrides:
+# {
+#   "slot_minutes": {"Cardiology": 30, "default": 20},
+#   "doctors": {
+#     "Dr. Asha Rao": {
+#       "weekly": {"Mon": ["09:00 AM-01:00 PM", "02:00 PM-05:00 PM"], "Sat": ["10:00 AM-01:00 PM"]},
+#       "breaks": ["11:00 AM-11:20 AM"],
+#       "slot_minutes": 15,
+#       "overrides": {"24-12-2026": ["09:00 AM-12:00 PM"], "31-12-2026": []}
+#     }
+#   }
+# }
+TEMPLATES_PATH = os.getenv("SCHEDULE_TEMPLATES_PATH", "schedule_templates.json")
+DEFAULT_SLOT_MINUTES = 20
+
+_lock = threading.Lock()
+_compiled_from = None   # (doctors, leaves, holidays, templates mtime) the cache was built from
+_compiled = {}          # doctor_lower -> compiled schedule
+_last_templates = {}    # last templates file that parsed, kept while a broken edit is live
+
+_TIME_FORMATS = ("%I:%M%p", "%I%p", "%H:%M", "%H")
+
+WEEKDAY_MAP = {
+    'mon': 0, 'monday': 0,
+    'tue': 1, 'tues': 1, 'tuesday': 1,
+    'wed': 2, 'wednesday': 2,
+    'thu': 3, 'thurs': 3, 'thursday': 3,
+    'fri': 4, 'friday': 4,
+    'sat': 5, 'saturday': 5,
+    'sun': 6, 'sunday': 6,
+}
+
+
+# ---------------- Parsing ----------------
+
+@lru_cache(maxsize=4096)
+def _to_minutes(s):
+    """'09:00 AM', '9am', '9.30 pm', '14:00' -> minutes since midnight."""
+    t = re.sub(r'([AP])\.?M\.?', r'\1M', str(s).strip().upper()).replace('.', ':').replace(' ', '')
+    for fmt in _TIME_FORMATS:
+        try:
+            dt = datetime.strptime(t, fmt)
+            return dt.hour * 60 + dt.minute
+        except ValueError:
+            continue
+    dt = parser.parse(str(s))
+    return dt.hour * 60 + dt.minute
+
+
+def _label(m):
+    """minutes since midnight -> 'hh:mm AM', the format used in the sheet and the chat buttons"""
+    return f"{(m // 60) % 12 or 12:02d}:{m % 60:02d} {'AM' if m < 720 else 'PM'}"
+
+
+def _doctor_workdays_to_indices(workdays_str):
+    # e.g. "Mon, Wed, Fri"
+    parts = [p.strip().lower() for p in workdays_str.split(',')]
+    idxs = []
+    for p in parts:
+        if p in WEEKDAY_MAP:
+            idxs.append(WEEKDAY_MAP[p])
+        else:
+            # try first 3 letters
+            p3 = p[:3]
+            if p3 in WEEKDAY_MAP:
+                idxs.append(WEEKDAY_MAP[p3])
+    return sorted(set(idxs))
+
+
+def _parse_interval(s):
+    """'09:00 AM-01:00 PM' -> (540, 780)"""
+    start, end = re.split(r'\s*[-–]\s*', str(s).strip(), maxsplit=1)
+    return _to_minutes(start), _to_minutes(end)
+
+
+def _parse_intervals(value, where=""):
+    """Comma-separated (or list of) intervals; unreadable ones are skipped with a warning."""
+    if not value:
+        return []
+    items = value if isinstance(value, list) else str(value).split(',')
+    out = []
+    for item in items:
+        if not str(item).strip():
+            continue
+        try:
+            out.append(_parse_interval(item))
+        except Exception as e:
+            print(f"[WARN] Ignoring interval {item!r} for {where} → {e}")
+    return out
+
+
+@lru_cache(maxsize=4096)
+def _date_ordinal(s):
+    s = str(s).strip()
+    try:
+        return datetime.strptime(s, "%d-%m-%Y").toordinal()
+    except ValueError:
+        return parser.parse(s, dayfirst=True).toordinal()
+
+
+# ---------------- Interval arithmetic ----------------
+
+def _merge(intervals):
+    """Sort and merge overlapping/touching intervals, dropping empty ones."""
+    out = []
+    for st, ed in sorted(i for i in intervals if i[1] > i[0]):
+        if out and st <= out[-1][1]:
+            out[-1] = (out[-1][0], max(out[-1][1], ed))
+        else:
+            out.append((st, ed))
+    return out
+
+
+def _subtract(intervals, breaks):
+    """intervals minus breaks; both lists of (start, end) minutes."""
+    out = []
+    breaks = _merge(breaks)
+    for st, ed in _merge(intervals):
+        cur = st
+        for bst, bed in breaks:
+            if bed <= cur or bst >= ed:
+                continue
+            if bst > cur:
+                out.append((cur, bst))
+            cur = max(cur, bed)
+        if cur < ed:
+            out.append((cur, ed))
+    return tuple(out)
+
+
+@lru_cache(maxsize=1024)
+def _slot_labels(intervals, slot_minutes):
+    """Slot start times that fit entirely inside the intervals, as 'hh:mm AM' strings."""
+    labels = []
+    for st, ed in intervals:
+        for m in range(st, ed - slot_minutes + 1, slot_minutes):
+            labels.append(_label(m))
+    return tuple(labels)
+
+
+# ---------------- Compilation ----------------
+
+def _templates_mtime():
+    try:
+        return os.path.getmtime(TEMPLATES_PATH)
+    except OSError:
+        return None
+
+
+def _load_templates():
+    """(templates, mtime); an unreadable file keeps the last good templates (caller holds _lock)."""
+    global _last_templates
+    mtime = _templates_mtime()
+    if mtime is None:
+        _last_templates = {}
+        return {}, None
+    try:
+        with open(TEMPLATES_PATH) as f:
+            templates = json.load(f)
+        if not isinstance(templates, dict):
+            raise ValueError("top level must be an object")
+    except (OSError, ValueError) as e:
+        print(f"[WARN] {TEMPLATES_PATH} unreadable, keeping previous schedule templates → {e}")
+        return _last_templates, mtime
+    _last_templates = templates
+    return templates, mtime
+
+
+def _as_dict(value, where):
+    """value if it is a JSON object; anything else is ignored with a warning."""
+    if isinstance(value, dict):
+        return value
+    if value:
+        print(f"[WARN] Ignoring {where} in schedule templates: expected an object, got {type(value).__name__}")
+    return {}
+
+
+def _slot_minutes(doctor_record, tpl, templates):
+    """First usable slot length: doctor template, sheet column, specialization, default."""
+    by_spec = {k.strip().lower(): v for k, v in _as_dict(templates.get("slot_minutes"), "slot_minutes").items()}
+    spec = str(doctor_record.get('Specialization', '')).strip().lower()
+    candidates = [
+        ("template", tpl.get("slot_minutes")),
+        ("Slot Minutes", doctor_record.get('Slot Minutes')),
+        ("specialization", by_spec.get(spec)),
+        ("default", by_spec.get("default")),
+    ]
+    for source, value in candidates:
+        if value is None or not str(value).strip():
+            continue
+        try:
+            minutes = int(str(value).strip())
+        except ValueError:
+            minutes = 0
+        if minutes > 0:
+            return minutes
+        print(f"[WARN] Ignoring {source} slot length {value!r} for {doctor_record.get('Doctor')}")
+    return DEFAULT_SLOT_MINUTES
+
+
+def compile_schedule(doctor_record, holiday_days=None, leave_days=None, templates=None):
+    """
+    Build the schedule for one doctor:
+      weekly[weekday]  -> tuple of (start, end) minute intervals, breaks removed
+      overrides[ord]   -> (intervals, status, note) for dates that differ from the weekly pattern
+    holiday_days: {ordinal: occasion}; leave_days: {ordinal: reason} for this doctor.
+    """
+    templates = templates or {}
+    name = doctor_record.get('Doctor', '').strip()
+    by_name = {k.strip().lower(): v for k, v in _as_dict(templates.get("doctors"), "doctors").items()}
+    tpl = _as_dict(by_name.get(name.lower()), f"template for {name}")
+
+    breaks = _parse_intervals(tpl.get("breaks") or doctor_record.get('Breaks', ''), f"{name} breaks")
+
+    weekly = [()] * 7
+    weekly_tpl = _as_dict(tpl.get("weekly"), f"weekly for {name}")
+    if weekly_tpl:
+        for day, spans in weekly_tpl.items():
+            idx = WEEKDAY_MAP.get(day.strip().lower()[:3])
+            if idx is not None:
+                weekly[idx] = _subtract(_parse_intervals(spans, f"{name} {day}"), breaks)
+    else:
+        try:
+            hours = [(_to_minutes(doctor_record['Start Time']), _to_minutes(doctor_record['End Time']))]
+        except Exception as e:
+            print(f"[WARN] Time parse failed for {name} → {e}")
+            hours = [(9 * 60, 17 * 60)]
+        day_intervals = _subtract(hours, breaks)
+        for idx in _doctor_workdays_to_indices(str(doctor_record.get('Days', ''))):
+            weekly[idx] = day_intervals
+
+    overrides = {}
+    for day, spans in _as_dict(tpl.get("overrides"), f"overrides for {name}").items():
+        try:
+            intervals = _subtract(_parse_intervals(spans, f"{name} {day}"), breaks)
+            overrides[_date_ordinal(day)] = (intervals, "Available" if intervals else "Closed", "")
+        except Exception as e:
+            print(f"[WARN] Ignoring override {day!r} for {name} → {e}")
+    # holidays and leave always close the day
+    for o, reason in (leave_days or {}).items():
+        overrides[o] = ((), "Leave", reason)
+    for o, occasion in (holiday_days or {}).items():
+        overrides[o] = ((), "Holiday", occasion)
+
+    return {
+        "doctor": name,
+        "slot_minutes": _slot_minutes(doctor_record, tpl, templates),
+        "weekly": tuple(weekly),
+        "overrides": overrides,
+    }
+
+
+def compile_schedules(doctors, leaves, holidays, templates=None):
+    """Compile every doctor in one go; returns {doctor_lower: schedule}."""
+    holiday_days = {}
+    for h in holidays:
+        if h.get('Date'):
+            try:
+                holiday_days[_date_ordinal(h['Date'])] = h.get('Occasion') or ""
+            except Exception:
+                continue
+    leave_days = {}
+    for l in leaves:
+        if l.get('Doctor') and l.get('Date'):
+            try:
+                leave_days.setdefault(l['Doctor'].strip().lower(), {})[_date_ordinal(l['Date'])] = l.get('Reason') or ""
+            except Exception:
+                continue
+
+    compiled = {}
+    for d in doctors:
+        if d.get('Doctor'):
+            key = d['Doctor'].strip().lower()
+            try:
+                compiled[key] = compile_schedule(d, holiday_days, leave_days.get(key), templates)
+            except Exception as e:
+                # one bad row must not take every other doctor's schedule down
+                print(f"[WARN] Schedule for {d['Doctor']} unreadable, using 09:00 AM-05:00 PM → {e}")
+                fallback = {"Doctor": d['Doctor'], "Days": str(d.get('Days', '')),
+                            "Start Time": "09:00 AM", "End Time": "05:00 PM"}
+                compiled[key] = compile_schedule(fallback, holiday_days, leave_days.get(key))
+    return compiled
+
+
+def get_schedule(doctor_record):
+    """
+    Compiled schedule for doctor_record, rebuilt only when the cached doctor/leave/holiday
+    sheets or the templates file change.
+    """
+    global _compiled_from, _compiled
+    from google_sheets import get_all_doctors, get_all_leaves, get_all_holidays
+
+    doctors, leaves, holidays = get_all_doctors(), get_all_leaves(), get_all_holidays()
+    mtime = _templates_mtime()
+    with _lock:
+        src = _compiled_from
+        if not (src and src[0] is doctors and src[1] is leaves and src[2] is holidays and src[3] == mtime):
+            templates, mtime = _load_templates()
+            _compiled = compile_schedules(doctors, leaves, holidays, templates)
+            _compiled_from = (doctors, leaves, holidays, mtime)
+        sched = _compiled.get(doctor_record.get('Doctor', '').strip().lower())
+    if sched is None:
+        # record that isn't in the sheet (yet): compile it on its own
+        sched = compile_schedule(doctor_record)
+    return sched
+
+
+# ---------------- Evaluation ----------------
+
+def day_info(sched, ordinal):
+    """
+    (intervals, status, note) for the date, or None if the doctor doesn't work that weekday
+    and has no override for it.
+    """
+    weekly = sched["weekly"][date.fromordinal(ordinal).weekday()]
+    ov = sched["overrides"].get(ordinal)
+    if ov is not None:
+        return ov if (weekly or ov[0]) else None
+    if weekly:
+        return weekly, "Available", ""
+    return None
+
+
+def slots_on(sched, ordinal, slot_minutes=None):
+    info = day_info(sched, ordinal)
+    if not info:
+        return ()
+    return _slot_labels(info[0], slot_minutes or sched["slot_minutes"])
+
+
+def iter_days(sched, start_ordinal, days):
+    """Yield (ordinal, status, note, slots) for each working day in [start, start + days)."""
+    slot = sched["slot_minutes"]
+    for o in range(start_ordinal, start_ordinal + days):
+        info = day_info(sched, o)
+        if info:
+            yield o, info[1], info[2], _slot_labels(info[0], slot)
+
+
+def count_slots(sched, start_ordinal, end_ordinal):
+    """Number of slots offered in start..end (inclusive), without walking every day."""
+    if end_ordinal < start_ordinal:
+        return 0
+    slot = sched["slot_minutes"]
+    per_day = [len(_slot_labels(iv, slot)) for iv in sched["weekly"]]
+
+    full_weeks, rest = divmod(end_ordinal - start_ordinal + 1, 7)
+    first = date.fromordinal(start_ordinal).weekday()
+    total = full_weeks * sum(per_day) + sum(per_day[(first + k) % 7] for k in range(rest))
+
+    for o, (intervals, _, _) in sched["overrides"].items():
+        if start_ordinal <= o <= end_ordinal:
+            total += len(_slot_labels(intervals, slot)) - per_day[date.fromordinal(o).weekday()]
+    return total
+
+
+def booked_by_day(bookings):
+    """{doctor_lower: {ordinal: {'hh:mm AM', ...}}} from booking rows."""
+    out = {}
+    for b in bookings:
+        if not (b.get('Doctor') and b.get('Date') and b.get('Time')):
+            continue
+        try:
+            o = _date_ordinal(b['Date'])
+            m = _to_minutes(b['Time'])
+        except Exception:
+            continue
+        out.setdefault(b['Doctor'].strip().lower(), {}).setdefault(o, set()).add(_label(m))
+    return out
+
+
+def get_booked(doctor_name, ordinal):
+    """Booked times for doctor on the date, read live from the bookings sheet."""
+    from google_sheets import get_all_bookings
+
+    key = doctor_name.strip().lower()
+    rows = [b for b in get_all_bookings() if str(b.get('Doctor', '')).strip().lower() == key]
+    return booked_by_day(rows).get(key, {}).get(ordinal, set())
@@ -1,5 +1,7 @@
 # google_sheets.py
 import os
+import time
+import threading
 from dotenv import load_dotenv
 import gspread
 from google.oauth2.service_account import Credentials
@@ -25,21 +27,86 @@ slots_sheet = _doctor_db.worksheet("slot")       # bookings (append here)
 holiday_sheet = _client.open_by_key(HOLIDAY_SHEET_ID).sheet1
 faq_sheet = _client.open_by_key(FAQ_SHEET_ID).sheet1
 
+# Reads of the rarely-changing sheets (doctors, leave, holidays, FAQ) are cached for
+# SHEET_CACHE_TTL seconds; synced_at is the watermark of the last fetch.
+# Bookings are never cached: every read goes to the sheet, so availability checks
+# and the rewrite in cancel_appointment always see other workers' and staff edits.
+CACHE_TTL = int(os.getenv("SHEET_CACHE_TTL", "60"))
+
+_sheets = {
+    "doctors": doctors_sheet,
+    "leaves": leaves_sheet,
+    "holidays": holiday_sheet,
+    "faq": faq_sheet,
+}
+
+# name -> {"records": [...], "synced_at": epoch seconds}
+_cache = {}
+_cache_lock = threading.Lock()
+_refreshing = set()
+
+def _fetch(name):
+    records = _sheets[name].get_all_records()
+    with _cache_lock:
+        _cache[name] = {"records": records, "synced_at": time.time()}
+        _refreshing.discard(name)
+    return records
+
+def _cached(name):
+    entry = _cache.get(name)
+    if entry:
+        if time.time() - entry["synced_at"] < CACHE_TTL:
+            return entry["records"]
+        # a background resync is already running: serve what we have
+        if name in _refreshing:
+            return entry["records"]
+    return _fetch(name)
+
+def refresh_all_in_background():
+    """
+    Re-fetch every sheet in a daemon thread. Until it finishes, callers keep
+    getting the (possibly stale) cached records, e.g. ones restored from a snapshot.
+    """
+    with _cache_lock:
+        names = [n for n in _sheets if n not in _refreshing]
+        _refreshing.update(names)
+
+    def run():
+        for name in names:
+            try:
+                _fetch(name)
+            except Exception as e:
+                print(f"[WARN] Sheet resync failed for {name} → {e}")
+                with _cache_lock:
+                    _refreshing.discard(name)
+
+    threading.Thread(target=run, daemon=True).start()
+
+def get_cache_state():
+    with _cache_lock:
+        return {name: dict(entry) for name, entry in _cache.items()}
+
+def restore_cache_state(state):
+    with _cache_lock:
+        for name, entry in state.items():
+            if name in _sheets:
+                _cache[name] = entry
+
 # Helper: get all records
 def get_all_doctors():
-    return doctors_sheet.get_all_records()
+    return _cached("doctors")
 
 def get_all_leaves():
-    return leaves_sheet.get_all_records()
+    return _cached("leaves")
 
 def get_all_bookings():
     return slots_sheet.get_all_records()
 
 def get_all_holidays():
-    return holiday_sheet.get_all_records()
+    return _cached("holidays")
 
 def get_all_faq():
-    return faq_sheet.get_all_records()
+    return _cached("faq")
 
 def append_booking(doctor, date_str, time_str, phone):
     """
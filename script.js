@@ -3,16 +3,27 @@ const userInput = document.getElementById("user-input");
 const sendBtn = document.getElementById("send-btn");
 
 const API_URL = "http://127.0.0.1:8000/message";
-const USER_ID = "user123"; // can make dynamic later
+const HISTORY_URL = "http://127.0.0.1:8000/history";
+// a random id per browser, so each visitor only ever sees their own conversation
+const USER_ID = localStorage.getItem("chatUserId") || crypto.randomUUID();
+localStorage.setItem("chatUserId", USER_ID);
+
+// token the backend hands out with each reply; required to read our history
+let historyToken = localStorage.getItem("chatHistoryToken");
+
+// seq of the last conversation turn shown, so we only fetch newer turns;
+// it only moves through /history, so turns from other tabs are never skipped
+let historyCursor = 0;
+// history fetches run one after another so no turn is shown twice
+let syncChain = Promise.resolve();
 
 //  Function to get current time in hh:mm AM/PM format
-function getCurrentTime() {
-  const now = new Date();
-  return now.toLocaleTimeString([], { hour: '2-digit', minute: '2-digit' });
+function getCurrentTime(date = new Date()) {
+  return date.toLocaleTimeString([], { hour: '2-digit', minute: '2-digit' });
 }
 
 //  Add message to chat
-function addMessage(text, sender = "bot", buttons = []) {
+function addMessage(text, sender = "bot", buttons = [], time = getCurrentTime()) {
   const messageDiv = document.createElement("div");
   messageDiv.classList.add(sender === "bot" ? "bot-message" : "user-message");
 
@@ -22,7 +33,7 @@ function addMessage(text, sender = "bot", buttons = []) {
   //  Add timestamp
   const timeSpan = document.createElement("div");
   timeSpan.classList.add("timestamp");
-  timeSpan.textContent = getCurrentTime();
+  timeSpan.textContent = time;
 
   // Append both
   messageDiv.appendChild(timeSpan);
@@ -44,8 +55,6 @@ function addMessage(text, sender = "bot", buttons = []) {
   }
 
   chatBox.scrollTop = chatBox.scrollHeight;
-  saveChatHistory();
-
 }
 
 //  Typing indicator
@@ -62,7 +71,9 @@ function showTyping() {
 async function sendMessage(message) {
   if (!message.trim()) return;
 
+  // shown until the turn comes back through /history, in order with any other tab's turns
   addMessage(message, "user");
+  const pending = chatBox.lastElementChild;
   userInput.value = "";
 
   // show typing indicator
@@ -75,37 +86,75 @@ async function sendMessage(message) {
   });
 
   const data = await response.json();
+  rememberReply(data);
 
-  // remove typing indicator
+  // remove typing indicator and the pending bubble, then show the turn from the log
   typingDiv.remove();
+  pending.remove();
+  await syncHistory();
+}
+
+//  Keep the history token from a /message reply
+function rememberReply(data) {
+  if (data.history_token && data.history_token !== historyToken) {
+    historyToken = data.history_token;
+    localStorage.setItem("chatHistoryToken", historyToken);
+  }
+}
 
-  addMessage(data.reply, "bot", data.buttons || []);
+//  Fetch and show only the turns after historyCursor
+function syncHistory() {
+  syncChain = syncChain.then(fetchNewTurns, fetchNewTurns);
+  return syncChain;
 }
 
-// auto-load welcome message on startup
-loadChatHistory();
+async function fetchNewTurns() {
+  if (!historyToken) return;
+  let more = true;
+  while (more) {
+    const response = await fetch(`${HISTORY_URL}?user_id=${encodeURIComponent(USER_ID)}&after=${historyCursor}`, {
+      headers: { "X-History-Token": historyToken },
+    });
+    if (!response.ok) {
+      // token no longer valid (e.g. backend secret changed): start a fresh conversation view
+      historyToken = null;
+      localStorage.removeItem("chatHistoryToken");
+      return;
+    }
+    const data = await response.json();
+    data.turns.forEach((turn) => {
+      const time = getCurrentTime(new Date(turn.ts * 1000));
+      if (!turn.hidden) addMessage(turn.text, "user", [], time);
+      addMessage(turn.reply, "bot", turn.buttons || [], time);
+    });
+    historyCursor = data.cursor;
+    more = data.more;
+  }
+}
+
+// restore the conversation on startup, or greet a new user
 window.onload = async () => {
+  await syncHistory();
+  if (historyCursor > 0) return;
+
+  // "start" is logged as hidden, so a reload shows the greeting but not the word "start"
+  const typingDiv = showTyping();
   const response = await fetch(API_URL, {
     method: "POST",
     headers: { "Content-Type": "application/json" },
-    body: JSON.stringify({ user_id: USER_ID, text: "start" }),
+    body: JSON.stringify({ user_id: USER_ID, text: "start", hidden: true }),
   });
   const data = await response.json();
-  addMessage(data.reply, "bot", data.buttons || []);
+  rememberReply(data);
+  typingDiv.remove();
+  await syncHistory();
 };
 
+// pick up turns sent from another tab while this one was in the background
+window.addEventListener("focus", syncHistory);
+
 // Send message on click or Enter
 sendBtn.onclick = () => sendMessage(userInput.value);
 userInput.addEventListener("keypress", (e) => {
   if (e.key === "Enter") sendMessage(userInput.value);
 });
- // save and load chat hostory  
-function saveChatHistory() {
-  const messages = chatBox.innerHTML;
-  localStorage.setItem("chatHistory", messages);
-}
-
-function loadChatHistory() {
-  const saved = localStorage.getItem("chatHistory");
-  if (saved) chatBox.innerHTML = saved;
-}
@@ -0,0 +1,111 @@
+# snapshot.py
+import os
+import mmap
+import time
+import pickle
+import struct
+import threading
+
+import analytics
+import google_sheets
+import waitlist
+from chatbot_logic import sessions, prune_idle_sessions
+
+SNAPSHOT_PATH = os.getenv("SNAPSHOT_PATH", "state.snapshot")
+SNAPSHOT_INTERVAL = int(os.getenv("SNAPSHOT_INTERVAL", "30"))
+
+# magic, format version, payload length, watermark (time the snapshot was taken)
+_MAGIC = b"HCBSNAP\0"
+_VERSION = 1
+_HEADER = struct.Struct("<8sIQd")
+
+_last_payload = None
+
+
+def _collect_state():
+    prune_idle_sessions()
+    with waitlist._lock:
+        wl = {"waitlists": dict(waitlist.waitlists), "holds": dict(waitlist.holds)}
+    return {
+        "sessions": dict(sessions),
+        "sheets": google_sheets.get_cache_state(),
+        "waitlist": wl,
+        "analytics": analytics.get_state(),
+    }
+
+
+def save_snapshot(path=None):
+    """
+    Write sessions, cached sheet records, waitlist and analytics state to disk.
+    The file is replaced atomically; nothing is written if the state is unchanged.
+    Returns True if a new snapshot was written.
+    """
+    global _last_payload
+    path = path or SNAPSHOT_PATH
+    payload = pickle.dumps(_collect_state(), protocol=pickle.HIGHEST_PROTOCOL)
+    if payload == _last_payload:
+        return False
+
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, _VERSION, len(payload), time.time()))
+        f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    _last_payload = payload
+    return True
+
+
+def load_snapshot(path=None):
+    """
+    Memory-map the snapshot at path and restore it into the running process.
+    Returns the snapshot watermark, or None if there was nothing usable to load.
+    """
+    path = path or SNAPSHOT_PATH
+    if not os.path.exists(path) or os.path.getsize(path) < _HEADER.size:
+        return None
+
+    try:
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            magic, version, length, watermark = _HEADER.unpack_from(mm, 0)
+            if magic != _MAGIC or version != _VERSION or _HEADER.size + length > len(mm):
+                print(f"[WARN] Ignoring incompatible snapshot {path}")
+                return None
+            with memoryview(mm)[_HEADER.size:_HEADER.size + length] as view:
+                state = pickle.loads(view)
+    except Exception as e:
+        print(f"[WARN] Snapshot load failed for {path} → {e}")
+        return None
+
+    # sessions created since startup win over restored ones; idle ones are dropped
+    for sid, sess in state.get("sessions", {}).items():
+        sessions.setdefault(sid, sess)
+    prune_idle_sessions()
+    google_sheets.restore_cache_state(state.get("sheets", {}))
+    wl = state.get("waitlist", {})
+    with waitlist._lock:
+        waitlist.waitlists.update(wl.get("waitlists", {}))
+        waitlist.holds.update(wl.get("holds", {}))
+    if "analytics" in state:
+        analytics.restore_state(state["analytics"])
+
+    print(f"[INFO] Restored {len(sessions)} sessions from snapshot taken at {time.ctime(watermark)}")
+    return watermark
+
+
+def start_snapshot_thread(interval=None, path=None):
+    """Save a snapshot every interval seconds in a daemon thread."""
+    interval = interval or SNAPSHOT_INTERVAL
+
+    def run():
+        while True:
+            time.sleep(interval)
+            try:
+                save_snapshot(path)
+            except Exception as e:
+                print(f"[WARN] Snapshot save failed → {e}")
+
+    t = threading.Thread(target=run, daemon=True)
+    t.start()
+    return t
@@ -0,0 +1,192 @@
+# waitlist.py
+import os
+import time
+import threading
+from collections import deque
+from datetime import datetime
+
+# how long a freed slot is reserved for the waitlisted patient it was offered to
+HOLD_MINUTES = int(os.getenv("WAITLIST_HOLD_MINUTES", "15"))
+# how often the background thread moves expired holds on and drops past dates
+CHECK_INTERVAL = int(os.getenv("WAITLIST_CHECK_INTERVAL", "60"))
+
+_lock = threading.Lock()
+
+# (doctor_lower, dd-mm-yyyy) -> deque of {"phone", "doctor", "date", "joined_at"}
+waitlists = {}
+
+# (doctor_lower, dd-mm-yyyy, "hh:mm AM") -> {"phone", "doctor", "date", "time", "expires_at"}
+holds = {}
+
+
+def _key(doctor, date_str):
+    return (doctor.strip().lower(), date_str)
+
+
+def join_waitlist(doctor, date_str, phone):
+    """
+    Add phone to the waitlist of doctor on date_str (dd-mm-yyyy).
+    Returns the 1-based position in the queue (existing position if already waiting).
+    """
+    key = _key(doctor, date_str)
+    phone = str(phone).strip()
+    with _lock:
+        queue = waitlists.setdefault(key, deque())
+        for i, entry in enumerate(queue):
+            if entry["phone"] == phone:
+                return i + 1
+        queue.append({"phone": phone, "doctor": doctor.strip(), "date": date_str, "joined_at": time.time()})
+        return len(queue)
+
+
+def leave_waitlist(doctor, date_str, phone):
+    key = _key(doctor, date_str)
+    phone = str(phone).strip()
+    with _lock:
+        queue = waitlists.get(key)
+        if not queue:
+            return False
+        kept = deque(e for e in queue if e["phone"] != phone)
+        removed = len(kept) != len(queue)
+        if kept:
+            waitlists[key] = kept
+        else:
+            waitlists.pop(key, None)
+        return removed
+
+
+def _next_waiting(key):
+    """Pop the next waitlisted entry for key (caller holds _lock)."""
+    queue = waitlists.get(key)
+    if not queue:
+        return None
+    entry = queue.popleft()
+    if not queue:
+        waitlists.pop(key, None)
+    return entry
+
+
+def _send_offer(entry, time_str):
+    from whatsapp_api import send_waitlist_offer_template
+    try:
+        status, resp = send_waitlist_offer_template(entry["phone"], entry["doctor"], entry["date"], time_str, HOLD_MINUTES)
+        print("📱 WhatsApp waitlist offer response:", status, resp)
+    except Exception as e:
+        print(f"[WARN] Waitlist offer to {entry['phone']} failed → {e}")
+
+
+def offer_freed_slot(doctor, date_str, time_str, now=None):
+    """
+    Called when a booking is cancelled. Holds the freed slot for the next
+    waitlisted patient and notifies them on WhatsApp.
+    Returns the hold dict, or None if nobody is waiting.
+    """
+    now = now or time.time()
+    key = _key(doctor, date_str)
+    with _lock:
+        entry = _next_waiting(key)
+        if not entry:
+            return None
+        hold = {
+            "phone": entry["phone"],
+            "doctor": entry["doctor"],
+            "date": date_str,
+            "time": time_str,
+            "expires_at": now + HOLD_MINUTES * 60,
+        }
+        holds[key + (time_str,)] = hold
+    _send_offer(entry, time_str)
+    return hold
+
+
+def expire_holds(now=None):
+    """
+    Release holds whose time ran out and pass each slot on to the next
+    waitlisted patient, if any.
+    """
+    now = now or time.time()
+    offers = []
+    with _lock:
+        expired = [k for k, h in holds.items() if h["expires_at"] <= now]
+        for k in expired:
+            hold = holds.pop(k)
+            entry = _next_waiting(k[:2])
+            if entry:
+                holds[k] = {
+                    "phone": entry["phone"],
+                    "doctor": entry["doctor"],
+                    "date": hold["date"],
+                    "time": hold["time"],
+                    "expires_at": now + HOLD_MINUTES * 60,
+                }
+                offers.append((entry, hold["time"]))
+    for entry, time_str in offers:
+        _send_offer(entry, time_str)
+
+
+def prune_past_dates(today=None):
+    """Drop waitlists and holds for dates before today."""
+    today = today or datetime.now().date()
+
+    def is_past(date_str):
+        try:
+            return datetime.strptime(date_str, "%d-%m-%Y").date() < today
+        except ValueError:
+            return False
+
+    with _lock:
+        for key in [k for k in waitlists if is_past(k[1])]:
+            waitlists.pop(key, None)
+        for key in [k for k in holds if is_past(k[1])]:
+            holds.pop(key, None)
+
+
+def start_expiry_thread(interval=None):
+    """
+    Every interval seconds, pass expired holds on to the next waitlisted patient
+    and drop past dates, so freed slots move on even if nobody looks them up.
+    """
+    interval = interval or CHECK_INTERVAL
+
+    def run():
+        while True:
+            time.sleep(interval)
+            try:
+                prune_past_dates()
+                expire_holds()
+            except Exception as e:
+                print(f"[WARN] Waitlist expiry check failed → {e}")
+
+    t = threading.Thread(target=run, daemon=True)
+    t.start()
+    return t
+
+
+def get_held_slots(doctor, date_str, phone=None):
+    """
+    Times on doctor/date currently held for someone other than phone.
+    Expired holds are ignored here; the expiry thread passes them on.
+    """
+    doc, date_key = _key(doctor, date_str)
+    phone = str(phone).strip() if phone else None
+    now = time.time()
+    with _lock:
+        return {
+            t for (d, dt, t), h in holds.items()
+            if d == doc and dt == date_key and h["phone"] != phone and h["expires_at"] > now
+        }
+
+
+def claim_hold(doctor, date_str, time_str, phone):
+    """
+    Drop the hold once the slot is booked (if it belongs to phone, or has expired
+    so the expiry thread doesn't offer a taken slot), and take phone off the
+    waitlist for that doctor/date.
+    """
+    key = _key(doctor, date_str)
+    phone = str(phone).strip()
+    with _lock:
+        hold = holds.get(key + (time_str,))
+        if hold and (hold["phone"] == phone or hold["expires_at"] <= time.time()):
+            holds.pop(key + (time_str,), None)
+    leave_waitlist(doctor, date_str, phone)
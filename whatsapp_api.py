@@ -10,13 +10,33 @@ PHONE_NUMBER_ID = os.getenv("WHATSAPP_PHONE_NUMBER_ID")
 TEMPLATE_CONFIRM = os.getenv("WHATSAPP_TEMPLATE_CONFIRMATION", "appointment_confirmation")
 BUSINESS_ACCOUNT_ID = os.getenv("WHATSAPP_BUSINESS_ACCOUNT_ID")
 
-BASE_URL = f"https://graph.facebook.com/v17.0/{PHONE_NUMBER_ID}/messages"
+# WHATSAPP_API_URL lets you point the bot at a local stand-in (see whatsapp_local.py)
+BASE_URL = os.getenv("WHATSAPP_API_URL", f"https://graph.facebook.com/v17.0/{PHONE_NUMBER_ID}/messages")
 
 HEADERS = {
     "Authorization": f"Bearer {TOKEN}",
     "Content-Type": "application/json"
 }
 
+# seconds to wait for the Graph API before giving up on a reply
+REQUEST_TIMEOUT = float(os.getenv("WHATSAPP_REQUEST_TIMEOUT", "10"))
+
+# keep-alive connection pool shared by every send, including the webhook workers' replies
+_http = requests.Session()
+_http.headers.update(HEADERS)
+
+def _post(payload):
+    try:
+        r = _http.post(BASE_URL, json=payload, timeout=REQUEST_TIMEOUT)
+    except requests.RequestException as e:
+        # a stalled Graph API call must not hold up the worker's queue
+        print(f"[WARN] WhatsApp send to {payload.get('to')} failed → {e}")
+        return 599, {"error": str(e)}
+    try:
+        return r.status_code, r.json()
+    except Exception:
+        return r.status_code, {"text": r.text}
+
 def send_confirmation_template(to_phone, doctor_name, date_str, time_str):
     """
     Sends a template message. This assumes a template with parameters exists in your WA Business account.
@@ -50,11 +70,7 @@ def send_confirmation_template(to_phone, doctor_name, date_str, time_str):
         }
     }
 
-    r = requests.post(BASE_URL, headers=HEADERS, json=payload)
-    try:
-        return r.status_code, r.json()
-    except Exception:
-        return r.status_code, {"text": r.text}
+    return _post(payload)
     
 def send_cancellation_template(to_phone, doctor_name, date_str, time_str):
     """
@@ -86,8 +102,97 @@ def send_cancellation_template(to_phone, doctor_name, date_str, time_str):
         }
     }
 
-    r = requests.post(BASE_URL, headers=HEADERS, json=payload)
-    try:
-        return r.status_code, r.json()
-    except Exception:
-        return r.status_code, {"text": r.text}
+    return _post(payload)
+
+def send_waitlist_offer_template(to_phone, doctor_name, date_str, time_str, hold_minutes):
+    """
+    Tells a waitlisted patient that a slot opened up and is held for them for hold_minutes.
+    """
+    if not to_phone.startswith("+"):
+        if to_phone.startswith("0"):
+            to_phone = "+91" + to_phone.lstrip("0")
+        else:
+            to_phone = "+91" + to_phone
+
+    payload = {
+        "messaging_product": "whatsapp",
+        "to": to_phone,
+        "type": "template",
+        "template": {
+            "name": os.getenv("WHATSAPP_TEMPLATE_WAITLIST_OFFER", "waitlist_slot_offer"),
+            "language": {"code": "en"},
+            "components": [
+                {
+                    "type": "body",
+                    "parameters": [
+                        {"type": "text", "text": doctor_name},
+                        {"type": "text", "text": date_str},
+                        {"type": "text", "text": time_str},
+                        {"type": "text", "text": str(hold_minutes)}
+                    ]
+                }
+            ]
+        }
+    }
+
+    return _post(payload)
+
+def send_text_message(to_phone, text):
+    """
+    Plain text reply. Only allowed inside the 24h window after the user messaged us.
+    """
+    payload = {
+        "messaging_product": "whatsapp",
+        "to": to_phone,
+        "type": "text",
+        "text": {"body": text[:4096]}
+    }
+    return _post(payload)
+
+def send_buttons_message(to_phone, text, buttons):
+    """
+    Interactive reply built from a chatbot "buttons" list.
+    Up to 3 options become reply buttons, up to 10 a list message; anything longer
+    falls back to a numbered text message. The option text is used as the reply id
+    so the user's tap comes back to process_message exactly as on the web widget.
+    """
+    if len(buttons) > 10:
+        lines = "\n".join(f"• {b}" for b in buttons)
+        return send_text_message(to_phone, f"{text}\n\n{lines}")
+
+    if len(buttons) <= 3:
+        action = {
+            "buttons": [
+                {"type": "reply", "reply": {"id": b[:256], "title": b[:20]}}
+                for b in buttons
+            ]
+        }
+        kind = "button"
+    else:
+        rows = []
+        for b in buttons:
+            row = {"id": b[:200], "title": b[:24]}
+            if len(b) > 24:
+                row["description"] = b[24:96]  # rest of a long option, e.g. "Doctor | Date | Time"
+            rows.append(row)
+        action = {"button": "Choose", "sections": [{"title": "Options", "rows": rows}]}
+        kind = "list"
+
+    payload = {
+        "messaging_product": "whatsapp",
+        "to": to_phone,
+        "type": "interactive",
+        "interactive": {
+            "type": kind,
+            "body": {"text": text[:1024]},
+            "action": action
+        }
+    }
+    return _post(payload)
+
+def send_reply(to_phone, response):
+    """Send a process_message() response dict back over WhatsApp."""
+    buttons = response.get("buttons") or []
+    if buttons:
+        return send_buttons_message(to_phone, response.get("reply", ""), buttons)
+    return send_text_message(to_phone, response.get("reply", ""))
@@ -0,0 +1,92 @@
+# whatsapp_local.py
+"""
+Local stand-in for the WhatsApp Cloud API, for testing the webhook without Meta.
+
+1. Run the fake Graph API:   uvicorn whatsapp_local:app --port 9000
+2. Start the bot with:       WHATSAPP_API_URL=http://127.0.0.1:9000/messages
+                             WHATSAPP_APP_SECRET=<any secret>
+3. Send inbound messages:    python whatsapp_local.py 919876543210 "hi"
+   or a burst:               python whatsapp_local.py --burst 500 "hi"
+
+Replies the bot sends show up in the uvicorn log and at GET /messages.
+"""
+import os
+import sys
+import hmac
+import json
+import time
+import uuid
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from fastapi import FastAPI
+from dotenv import load_dotenv
+
+load_dotenv()
+
+BOT_WEBHOOK_URL = os.getenv("BOT_WEBHOOK_URL", "http://127.0.0.1:8000/webhook")
+
+app = FastAPI(title="Local WhatsApp Cloud API stand-in")
+
+# outbound messages the bot has "sent"
+sent = []
+
+@app.post("/messages")
+def fake_send(payload: dict):
+    sent.append(payload)
+    body = payload.get("text", {}).get("body") or payload.get("interactive", {}).get("body", {}).get("text")
+    print(f"→ {payload.get('to')} [{payload.get('type')}] {body}")
+    return {"messaging_product": "whatsapp", "messages": [{"id": f"wamid.local.{uuid.uuid4().hex}"}]}
+
+@app.get("/messages")
+def list_sent():
+    return sent
+
+
+def build_payload(wa_id, text):
+    return {
+        "object": "whatsapp_business_account",
+        "entry": [{
+            "changes": [{
+                "field": "messages",
+                "value": {
+                    "messaging_product": "whatsapp",
+                    "messages": [{
+                        "from": wa_id,
+                        "id": f"wamid.local.{uuid.uuid4().hex}",
+                        "timestamp": str(int(time.time())),
+                        "type": "text",
+                        "text": {"body": text}
+                    }]
+                }
+            }]
+        }]
+    }
+
+
+def send_inbound(wa_id, text, url=None):
+    """POST a signed inbound message to the bot's webhook, as Meta would."""
+    body = json.dumps(build_payload(wa_id, text)).encode()
+    secret = os.getenv("WHATSAPP_APP_SECRET", "")
+    sig = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    r = requests.post(url or BOT_WEBHOOK_URL, data=body, headers={
+        "Content-Type": "application/json",
+        "X-Hub-Signature-256": f"sha256={sig}",
+    })
+    return r.status_code
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if len(args) == 3 and args[0] == "--burst":
+        n, text = int(args[1]), args[2]
+        start = time.time()
+        with ThreadPoolExecutor(max_workers=32) as pool:
+            codes = list(pool.map(lambda i: send_inbound(f"9190000{i:05d}", text), range(n)))
+        took = time.time() - start
+        print(f"{n} messages acknowledged in {took:.2f}s ({n / took:.0f}/s), status codes: {sorted(set(codes))}")
+    elif len(args) == 2:
+        print(send_inbound(args[0], args[1]))
+    else:
+        print(__doc__)
@@ -0,0 +1,130 @@
+# whatsapp_webhook.py
+import os
+import hmac
+import zlib
+import queue
+import hashlib
+import threading
+from collections import OrderedDict
+
+from dotenv import load_dotenv
+
+from chatbot_logic import process_message
+from whatsapp_api import send_reply
+from conversation_log import record_turn
+
+load_dotenv()
+
+APP_SECRET = os.getenv("WHATSAPP_APP_SECRET")
+VERIFY_TOKEN = os.getenv("WHATSAPP_VERIFY_TOKEN")
+WORKERS = int(os.getenv("WHATSAPP_WORKERS", "16"))
+BATCH_SIZE = int(os.getenv("WHATSAPP_BATCH_SIZE", "50"))
+
+# One queue per worker; a user always hashes to the same queue, so their
+# messages are handled in order while different users run in parallel.
+_queues = [queue.Queue() for _ in range(WORKERS)]
+_started = False
+_start_lock = threading.Lock()
+
+# WhatsApp retries deliveries it thinks failed; remember recent message ids
+_seen_ids = OrderedDict()
+_seen_lock = threading.Lock()
+_SEEN_MAX = 10000
+
+
+def verify_signature(body, signature_header):
+    """Check the X-Hub-Signature-256 header ("sha256=<hex>") against the raw request body."""
+    if not APP_SECRET or not signature_header or not signature_header.startswith("sha256="):
+        return False
+    expected = hmac.new(APP_SECRET.encode(), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature_header[len("sha256="):])
+
+
+def verify_subscription(mode, token, challenge):
+    """Returns the challenge to echo back for a valid hub.subscribe request, else None."""
+    if mode == "subscribe" and VERIFY_TOKEN and token == VERIFY_TOKEN:
+        return challenge
+    return None
+
+
+def _message_text(m):
+    kind = m.get("type")
+    if kind == "text":
+        return m.get("text", {}).get("body")
+    if kind == "interactive":
+        inter = m.get("interactive", {})
+        reply = inter.get("button_reply") or inter.get("list_reply") or {}
+        return reply.get("id") or reply.get("title")
+    if kind == "button":  # quick reply on a template message
+        return m.get("button", {}).get("text")
+    return None
+
+
+def extract_messages(payload):
+    """
+    Pull (wa_id, text) pairs out of a webhook payload, skipping statuses,
+    unsupported message types and ids we have already seen.
+    """
+    out = []
+    for entry in payload.get("entry", []):
+        for change in entry.get("changes", []):
+            for m in change.get("value", {}).get("messages", []):
+                text = _message_text(m)
+                if not text or not m.get("from"):
+                    continue
+                mid = m.get("id")
+                if mid:
+                    with _seen_lock:
+                        if mid in _seen_ids:
+                            continue
+                        _seen_ids[mid] = True
+                        if len(_seen_ids) > _SEEN_MAX:
+                            _seen_ids.popitem(last=False)
+                out.append((m["from"], text))
+    return out
+
+
+def _handle(wa_id, text):
+    # namespaced so a web client can't pick a phone number as its user_id
+    user_id = "wa:" + wa_id
+    try:
+        response = process_message(user_id, text)
+        record_turn(user_id, text, response)
+        status, resp = send_reply("+" + wa_id, response)
+        if status >= 400:
+            print(f"[WARN] WhatsApp reply to {wa_id} failed → {status} {resp}")
+    except Exception as e:
+        print(f"[WARN] Failed to handle WhatsApp message from {wa_id} → {e}")
+
+
+def _worker(q):
+    while True:
+        batch = [q.get()]
+        # drain whatever else is already waiting so a burst costs one wakeup
+        while len(batch) < BATCH_SIZE:
+            try:
+                batch.append(q.get_nowait())
+            except queue.Empty:
+                break
+        for wa_id, text in batch:
+            _handle(wa_id, text)
+        for _ in batch:
+            q.task_done()
+
+
+def start_workers():
+    global _started
+    with _start_lock:
+        if _started:
+            return
+        for q in _queues:
+            threading.Thread(target=_worker, args=(q,), daemon=True).start()
+        _started = True
+
+
+def enqueue_payload(payload):
+    """Queue every message in a webhook payload; returns how many were queued."""
+    messages = extract_messages(payload)
+    for wa_id, text in messages:
+        _queues[zlib.crc32(wa_id.encode()) % WORKERS].put((wa_id, text))
+    return len(messages)